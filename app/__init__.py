@@ -1,8 +1,9 @@
 
+import click
 from flask import Flask
 from .extensions import db, migrate, login_manager, csrf
 from .config import Config
-from .models import seed_defaults
+from .models import seed_defaults, ensure_schema
 
 def create_app():
     app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -29,8 +30,34 @@ def create_app():
     app.register_blueprint(assets_bp)
     app.register_blueprint(masters_bp)
 
+    @app.cli.command("snapshot")
+    @click.option("--date", "day", default=None, help="Expected day (YYYY-MM-DD); must be today, since the current data is counted.")
+    def snapshot_command(day):
+        """Write today's analytics rollup rows (safe to re-run; run daily from cron)."""
+        from datetime import date
+        from .snapshots import take_snapshot
+        try:
+            n = take_snapshot(date.fromisoformat(day) if day else None)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--date")
+        click.echo(f"Wrote {n} snapshot rows")
+
+    @app.cli.command("archive")
+    @click.option("--location", "locations", multiple=True, help="Archive assets at this location (repeatable); ARCHIVE_LOCATIONS is used when no rule option is given.")
+    @click.option("--category", "categories", multiple=True, help="Archive assets in this category (repeatable).")
+    @click.option("--older-than", "older_than", type=int, default=None, help="Only assets not updated for this many days.")
+    @click.option("--dry-run", is_flag=True, help="Only count the matching assets.")
+    def archive_command(locations, categories, older_than, dry_run):
+        """Move retired assets to the archive table in chunked transactions."""
+        from .archive import archive_assets, retirement_criteria
+        if not (locations or categories or older_than is not None):
+            locations = tuple(app.config["ARCHIVE_LOCATIONS"])
+        n = archive_assets(retirement_criteria(locations, categories, older_than), dry_run=dry_run)
+        click.echo(f"{'Would archive' if dry_run else 'Archived'} {n} assets")
+
     with app.app_context():
         db.create_all()
+        ensure_schema()
         seed_defaults()
 
     return app
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, literal
+from .extensions import db
+from .models import Asset, ArchivedAsset, AssetTombstone
+from .cache import bump_data_version
+
+ARCHIVE_CHUNK = 1000
+
+
+def retirement_criteria(locations=(), categories=(), older_than_days=None):
+    """WHERE criteria for the retirement rule; every given part must match."""
+    crit = []
+    if locations:
+        crit.append(Asset.location.in_(list(locations)))
+    if categories:
+        crit.append(Asset.category.in_(list(categories)))
+    if older_than_days is not None:
+        crit.append(Asset.updated_at < datetime.utcnow() - timedelta(days=older_than_days))
+    return crit
+
+
+def archive_assets(criteria, chunk=ARCHIVE_CHUNK, dry_run=False):
+    """
+    Move assets matching `criteria` into the archive table, `chunk` rows per
+    transaction (copy, tombstone for delta sync, then delete from the hot table).
+    Returns the number moved.
+    """
+    if not criteria:
+        raise ValueError("refusing to archive without a retirement rule")
+    if dry_run:
+        return db.session.query(db.func.count(Asset.id)).filter(*criteria).scalar()
+    names = [c.name for c in Asset.__table__.columns]
+    moved = 0
+    while True:
+        ids = db.session.execute(select(Asset.id).where(*criteria).order_by(Asset.id).limit(chunk)).scalars().all()
+        if not ids:
+            break
+        cols = [Asset.__table__.c[n] for n in names]
+        now = datetime.utcnow()
+        db.session.execute(insert(ArchivedAsset).from_select(
+            names + ["archived_at"],
+            select(*cols, literal(now, ArchivedAsset.archived_at.type)).where(Asset.id.in_(ids))))
+        db.session.execute(insert(AssetTombstone).from_select(
+            ["asset_id", "deleted_at"], select(Asset.id, literal(now, AssetTombstone.deleted_at.type)).where(Asset.id.in_(ids))))
+        db.session.execute(delete(Asset).where(Asset.id.in_(ids)).execution_options(synchronize_session=False))
+        bump_data_version()
+        db.session.commit()
+        moved += len(ids)
+    return moved
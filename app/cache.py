@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from threading import Lock
+from flask import g
+from sqlalchemy import update
+from .extensions import db
+from .models import DataVersion
+
+# The stamp lives in the one-row data_version table so writes from other workers
+# and the CLI move it too. Cached entries remember the stamp they were computed
+# under and are treated as misses once it moves on.
+
+
+def data_version():
+    """Current stamp, read from the database at most once per request."""
+    if "data_version" not in g:
+        g.data_version = db.session.query(DataVersion.version).filter_by(id=1).scalar() or 0
+    return g.data_version
+
+
+def bump_data_version():
+    """Bump the stamp in the caller's transaction; it commits (or rolls back) with the write."""
+    db.session.execute(update(DataVersion).where(DataVersion.id == 1).values(version=DataVersion.version + 1))
+    g.pop("data_version", None)
+
+
+class LRUCache:
+    """Bounded LRU of (data version, value) entries with hit/miss counters."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self, key):
+        version = data_version()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        version = data_version() if version is None else version
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
@@ -5,3 +5,10 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL","sqlite:///inventory.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "uploads")
+    IMPORT_PARALLEL_MIN_BYTES = int(os.environ.get("IMPORT_PARALLEL_MIN_BYTES", 16 * 1024 * 1024))
+    IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", 0)) or None
+    # default retirement rule for `flask archive`: assets at these locations move to cold storage
+    ARCHIVE_LOCATIONS = [l.strip() for l in os.environ.get("ARCHIVE_LOCATIONS", "Scrapped,Retired,Shipped Back").split(",") if l.strip()]
+    # master renames touching more assets than this are rewritten in the background, RENAME_CHUNK rows at a time
+    RENAME_SYNC_LIMIT = int(os.environ.get("RENAME_SYNC_LIMIT", 20000))
+    RENAME_CHUNK = int(os.environ.get("RENAME_CHUNK", 5000))
@@ -1,6 +1,7 @@
 
 from .extensions import db
 from flask_login import UserMixin
+from datetime import datetime, timedelta
 
 ROLE_SUPERADMIN = "superadmin"
 ROLE_ADMIN = "admin"
@@ -57,7 +58,8 @@ class SubCategoryM(db.Model):
     category = db.relationship('CategoryM', backref='subcategories')
     __table_args__ = (db.UniqueConstraint('name','category_id', name='uq_subcat_name_cat'),)
 
-class Asset(db.Model):
+class AssetColumns:
+    """Columns shared by the live asset table and its archive."""
     id = db.Column(db.Integer, primary_key=True)
     invoice_no = db.Column(db.String(120))
     invoice_date = db.Column(db.Date)
@@ -85,6 +87,93 @@ class Asset(db.Model):
     category = db.Column(db.String(120))
     sub_category = db.Column(db.String(120))
     location = db.Column(db.String(120))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+class Asset(AssetColumns, db.Model):
+    # ids are never handed out again once a row is archived or deleted
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class ArchivedAsset(AssetColumns, db.Model):
+    """Cold storage for retired assets; same columns as Asset, rows keep their original id."""
+    __tablename__ = 'asset_archive'
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class AssetTombstone(db.Model):
+    """Marker left behind by a deleted asset so delta sync can report the removal."""
+    __tablename__ = 'asset_tombstone'
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class AssetSnapshot(db.Model):
+    """Daily rollup row: number of assets with `value` in `dimension` on `day`."""
+    __tablename__ = 'asset_snapshot'
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    dimension = db.Column(db.String(20), nullable=False)
+    value = db.Column(db.String(120), nullable=False, default="")
+    count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint('day','dimension','value', name='uq_snapshot_day_dim_value'),
+                      db.Index('ix_snapshot_dim_day', 'dimension', 'day'))
+
+class DataVersion(db.Model):
+    """Single-row stamp bumped in the same transaction as every asset/master write."""
+    __tablename__ = 'data_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def calibration_bucket(today, model=None):
+    """SQL expression classifying next_calibration as overdue / due_soon (<=30d) / current / unknown."""
+    nxt = (model or Asset).next_calibration
+    return db.case((nxt == None, "unknown"),
+                   (nxt <= today, "overdue"),
+                   (nxt <= today + timedelta(days=30), "due_soon"),
+                   else_="current")
+
+# columns added after the initial schema; create_all() does not alter existing tables
+_LATE_COLUMNS = [
+    ("asset", "created_at", "DATETIME"),
+    ("asset", "updated_at", "DATETIME"),
+]
+
+def ensure_schema():
+    """Add late columns (and their indexes) to databases created before they existed."""
+    from sqlalchemy import inspect, text
+    insp = inspect(db.engine)
+    stamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+    with db.engine.begin() as conn:
+        for table, col, ddl in _LATE_COLUMNS:
+            if col in {c["name"] for c in insp.get_columns(table)}:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {ddl}"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{col} ON {table} ({col})"))
+            if ddl == "DATETIME":
+                conn.execute(text(f"UPDATE {table} SET {col} = :ts WHERE {col} IS NULL"), {"ts": stamp})
+        if db.engine.dialect.name == "sqlite":
+            _ensure_asset_autoincrement(conn)
+
+def _ensure_asset_autoincrement(conn):
+    """
+    Rebuild an `asset` table created without AUTOINCREMENT, then start its sequence
+    past every id already used by live, archived or deleted assets.
+    """
+    from sqlalchemy import text
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type='table' AND name='asset'")).scalar() or ""
+    if "AUTOINCREMENT" in ddl.upper():
+        return
+    cols = ", ".join(c.name for c in Asset.__table__.columns)
+    conn.execute(text("ALTER TABLE asset RENAME TO _asset_rebuild"))
+    for (name,) in conn.execute(text("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='_asset_rebuild' AND sql IS NOT NULL")).all():
+        conn.execute(text(f'DROP INDEX "{name}"'))
+    Asset.__table__.create(conn)
+    conn.execute(text(f"INSERT INTO asset ({cols}) SELECT {cols} FROM _asset_rebuild"))
+    conn.execute(text("DROP TABLE _asset_rebuild"))
+    used = conn.execute(text(
+        "SELECT max(m) FROM (SELECT max(id) AS m FROM asset UNION ALL SELECT max(id) FROM asset_archive"
+        " UNION ALL SELECT max(asset_id) FROM asset_tombstone)")).scalar() or 0
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name='asset'"))
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('asset', :seq)"), {"seq": used})
 
 def seed_defaults():
     from werkzeug.security import generate_password_hash
@@ -92,6 +181,8 @@ def seed_defaults():
         admin = User(name="Super Admin", email="admin@example.com",
                      password_hash=generate_password_hash("admin123"), role=ROLE_SUPERADMIN)
         db.session.add(admin)
+    if not db.session.get(DataVersion, 1):
+        db.session.add(DataVersion(id=1, version=0))
     if not Team.query.first():
         db.session.add_all([Team(name=n) for n in ["Validation","Platform","Manufacturing","R&D"]])
     if not Manufacturer.query.first():
@@ -1,11 +1,15 @@
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash, send_file, jsonify, session, current_app
+from flask import Blueprint, render_template, redirect, url_for, request, flash, send_file, jsonify, session, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
-from sqlalchemy import or_
-from ..extensions import db
-from ..models import Asset, Team, Manufacturer, VendorM, LocationM, Recipient, CategoryM, SubCategoryM
+from sqlalchemy import or_, and_, true, update, delete as sa_delete, insert, select, literal, func, union_all
+from collections import Counter
+from flask_sqlalchemy.pagination import Pagination, SelectPagination
+from ..extensions import db, csrf
+from ..models import Asset, ArchivedAsset, AssetTombstone, calibration_bucket, Team, Manufacturer, VendorM, LocationM, CategoryM
 from ..forms import AssetForm
-import io, csv, os, uuid
+from .. import typeahead, snapshots
+from ..cache import LRUCache, data_version, bump_data_version
+import io, csv, os, uuid, json
 import pandas as pd
 from openpyxl import load_workbook
 from datetime import date, timedelta, datetime
@@ -101,44 +105,201 @@ def clean_str(value):
         return None
     return str(value).strip()
 
+YNNA_FIELDS = {"is_bonded", "returnable_no", "cap_x"}
 
+def coerce_asset_fields(r, fields=None):
+    """Apply the import coercion rules to a raw record; `fields` defaults to EXPECTED_COLS."""
+    out = {}
+    for k in (EXPECTED_COLS if fields is None else fields):
+        v = r.get(k)
+        if k in DATE_HEADERS:
+            out[k] = parse_date(v)
+        elif k in YNNA_FIELDS:
+            out[k] = norm_ynna(v)
+        else:
+            out[k] = clean_str(v)
+    return out
 
-@assets_bp.route("/")
-@login_required
-def dashboard():
-    q = request.args.get("q","").strip()
-    category = request.args.get("category","").strip()
-    location = request.args.get("location","").strip()
-    query = Asset.query
+
+
+def _asset_filters(q, category, location, model=Asset):
+    """WHERE criteria for the dashboard filter (search text, category, location) on Asset or ArchivedAsset."""
+    crit = []
     if q:
         like = f"%{q}%"
-        query = query.filter(or_(Asset.invoice_no.like(like), Asset.serial_number.like(like), Asset.model.like(like), Asset.description.like(like)))
+        crit.append(or_(model.invoice_no.like(like), model.serial_number.like(like), model.model.like(like), model.description.like(like)))
     if category:
-        query = query.filter(Asset.category==category)
+        crit.append(model.category==category)
     if location:
-        query = query.filter(Asset.location==location)
-    page = request.args.get("page", 1, type=int)
-    assets = query.order_by(Asset.id.desc()).paginate(page=page, per_page=10)
-    categories = [c.name for c in CategoryM.query.order_by(CategoryM.name.asc()).all()]
-    locations = [l.name for l in LocationM.query.order_by(LocationM.name.asc()).all()]
-    return render_template("assets/index.html", assets=assets, q=q, categories=categories, locations=locations, can_create=can_create(), can_export=can_export(), can_delete=can_delete(), )
+        crit.append(model.location==location)
+    return crit
+
+def _filter_values(args):
+    """(q, category, location) from request args or a bulk payload."""
+    return tuple((args.get(k) or "").strip() for k in ("q", "category", "location"))
+
+EXPORT_COLUMNS = [c.name for c in Asset.__table__.columns]
+
+def _requested_columns(args):
+    """Columns named in ?columns=a,b (or repeated), in request order; all columns if none are valid."""
+    wanted = [c.strip() for v in args.getlist("columns") for c in v.split(",")]
+    cols = list(dict.fromkeys(c for c in wanted if c in EXPORT_COLUMNS))
+    return cols or EXPORT_COLUMNS
+
+def _include_archived(args):
+    return (args.get("archived") or "").lower() in ("1", "true", "on", "yes")
+
+def asset_select(args, columns=None, flag_archived=False):
+    """
+    SELECT of `columns` over the assets matching the dashboard filter in `args`, newest
+    first. The archive table is only read (UNION ALL) when ?archived=1; `flag_archived`
+    then adds an `archived` column marking the rows that came from it.
+    """
+    names = columns or EXPORT_COLUMNS
+    filters = _filter_values(args)
+    if not _include_archived(args):
+        return select(*[Asset.__table__.c[n] for n in names]).where(*_asset_filters(*filters)).order_by(Asset.id.desc())
+    keep = names if "id" in names else names + ["id"]  # id is the sort key
+    parts = [select(*[m.__table__.c[n] for n in keep], *([literal(m is ArchivedAsset).label("archived")] if flag_archived else []))
+             .where(*_asset_filters(*filters, model=m)) for m in (Asset, ArchivedAsset)]
+    sub = union_all(*parts).subquery()
+    return select(*[sub.c[n] for n in names], *([sub.c.archived] if flag_archived else [])).order_by(sub.c.id.desc())
+
+CAL_BUCKETS = ["overdue", "due_soon", "current", "unknown"]
+_facet_cache = LRUCache(maxsize=256)
+
+def _facet_counts(q, category, location, archived=False):
+    """
+    Live counts per category, location, team and calibration bucket for the current filter,
+    from one grouped aggregate per table. Each facet ignores its own selection (so the
+    category dropdown still shows the other categories) but honours the rest.
+    """
+    key = (q, category, location, archived, date.today())
+    facets = _facet_cache.get(key)
+    if facets is not None:
+        return facets
+    version = data_version()
+    counts = {"category": Counter(), "location": Counter(), "team": Counter(), "calibration": Counter()}
+    for model in ((Asset, ArchivedAsset) if archived else (Asset,)):
+        bucket = calibration_bucket(date.today(), model)
+        rows = (db.session.query(model.category, model.location, model.team, bucket, func.count(model.id))
+                .filter(*_asset_filters(q, "", "", model=model))
+                .group_by(model.category, model.location, model.team, bucket).all())
+        for cat, loc, team, cal, n in rows:
+            cat_ok = not category or cat == category
+            loc_ok = not location or loc == location
+            if loc_ok:
+                counts["category"][cat] += n
+            if cat_ok:
+                counts["location"][loc] += n
+            if cat_ok and loc_ok:
+                counts["team"][team] += n
+                counts["calibration"][cal] += n
+    facets = {k: dict(v) for k, v in counts.items()}
+    _facet_cache.put(key, facets, version)
+    return facets
+
+class RowPagination(SelectPagination):
+    """Pagination over a plain (non-entity) select; items are Row objects."""
+    def _query_items(self):
+        stmt = self._query_args["select"].limit(self.per_page).offset(self._query_offset)
+        return list(self._query_args["session"].execute(stmt))
+
+class CachedPagination(Pagination):
+    """Pagination rebuilt from a listing-cache entry (items already loaded, total known)."""
+    def _query_items(self):
+        return self._query_args["items"]
+
+    def _query_count(self):
+        return self._query_args["total"]
+
+PER_PAGE = 10
+_listing_cache = LRUCache(maxsize=512)
+_dropdown_cache = LRUCache(maxsize=1)
+
+def _dropdowns():
+    """Category and location names for the filter dropdowns (cached until the next write)."""
+    cached = _dropdown_cache.get("dropdowns")
+    if cached is None:
+        version = data_version()
+        cached = ([c.name for c in CategoryM.query.order_by(CategoryM.name.asc()).all()],
+                  [l.name for l in LocationM.query.order_by(LocationM.name.asc()).all()])
+        _dropdown_cache.put("dropdowns", cached, version)
+    return cached
+
+@assets_bp.route("/")
+@login_required
+def dashboard():
+    q, category, location = _filter_values(request.args)
+    archived = _include_archived(request.args)
+    page = max(request.args.get("page", 1, type=int) or 1, 1)
+    if archived:
+        # rows from both tables; archived ones are flagged so the table can mark them read-only
+        stmt = asset_select(request.args, flag_archived=True)
+        id_col, paginate = stmt.selected_columns.id, RowPagination
+    else:
+        stmt, id_col, paginate = select(Asset).where(*_asset_filters(q, category, location)).order_by(Asset.id.desc()), Asset.id, SelectPagination
+
+    # the cache keeps the page's ids and the total, so a repeat view skips the
+    # filtered scan and the COUNT(*) and only loads its rows by primary key
+    key = (q, category, location, archived, page)
+    cached = _listing_cache.get(key)
+    if cached is None:
+        version = data_version()
+        assets = paginate(select=stmt, session=db.session(), page=page, per_page=PER_PAGE)
+        _listing_cache.put(key, ([a.id for a in assets.items], assets.total), version)
+    else:
+        ids, total = cached
+        result = db.session.execute(stmt.where(id_col.in_(ids))) if ids else None
+        items = [] if result is None else list(result) if archived else list(result.scalars())
+        assets = CachedPagination(page=page, per_page=PER_PAGE, items=items, total=total)
+    categories, locations = _dropdowns()
+    facets = _facet_counts(q, category, location, archived)
+    return render_template("assets/index.html", assets=assets, q=q, categories=categories, locations=locations, facets=facets, cal_buckets=CAL_BUCKETS, include_archived=archived, can_create=can_create(), can_export=can_export(), can_delete=can_delete(), )
+
+@assets_bp.route("/cache/stats.json")
+@login_required
+def cache_stats():
+    return jsonify({"data_version": data_version(), "listing": _listing_cache.stats(), "dropdowns": _dropdown_cache.stats(), "facets": _facet_cache.stats()})
+
+FORM_CHOICES_LIMIT = typeahead.SEARCH_MAX
 
 def _set_choices(form: AssetForm):
-    form.team.choices = [("", "")] + [(t.name, t.name) for t in Team.query.order_by(Team.name.asc()).all()]
-    form.manufacturer.choices = [("", "")] + [(m.name, m.name) for m in Manufacturer.query.order_by(Manufacturer.name.asc()).all()]
-    form.vendor.choices = [("", "")] + [(v.name, v.name) for v in VendorM.query.order_by(VendorM.name.asc()).all()]
-    form.location.choices = [("", "")] + [(l.name, l.name) for l in LocationM.query.order_by(LocationM.name.asc()).all()]
-    form.category.choices = [("", "")] + [(c.name, c.name) for c in CategoryM.query.order_by(CategoryM.name.asc()).all()]
-    form.sub_category.choices = [("", "")] + [(s.name, s.name) for s in SubCategoryM.query.order_by(SubCategoryM.name.asc()).all()]
+    """
+    Fill select choices with the first FORM_CHOICES_LIMIT names from the typeahead
+    index (plus the current value). Returns the kinds that were cut short; the form
+    fetches those on demand from masters.api_search.
+    """
+    truncated = []
+    for field, kind, model in ((form.team, "team", Team), (form.manufacturer, "manufacturer", Manufacturer),
+                               (form.vendor, "vendor", VendorM), (form.location, "location", LocationM),
+                               (form.category, "category", CategoryM)):
+        idx = typeahead.get_index(kind, model)
+        names = [p["name"] for p in idx.search("", FORM_CHOICES_LIMIT)]
+        if len(idx.items) > len(names):
+            truncated.append(kind)
+        if field.data and field.data not in names:
+            names.append(field.data)
+        field.choices = [("", "")] + [(n, n) for n in names]
+    # subcategories are loaded per category by the form
+    form.sub_category.choices = [("", "")] + ([(form.sub_category.data, form.sub_category.data)] if form.sub_category.data else [])
+    return truncated
+
+def _category_map(form: AssetForm):
+    """Category name -> id for the names offered in the form (used for subcategory lookups)."""
+    idx = typeahead.get_index("category", CategoryM)
+    cats = {p["name"]: p["id"] for p in idx.search("", FORM_CHOICES_LIMIT)}
+    if form.category.data and form.category.data not in cats:
+        cats.update({p["name"]: p["id"] for p in idx.search(form.category.data, 5) if p["name"] == form.category.data})
+    return cats
 
 @assets_bp.route("/assets/create", methods=["GET","POST"])
 @login_required
 def create():
     if not can_create():
         flash("Permission denied", "error"); return redirect(url_for("assets.dashboard"))
-    form = AssetForm(); _set_choices(form)
-    recips = Recipient.query.order_by(Recipient.name.asc()).all()
-    cats = CategoryM.query.order_by(CategoryM.name.asc()).all()
+    form = AssetForm(); truncated = _set_choices(form)
+    cats = _category_map(form)
     if form.validate_on_submit():
         a = Asset(
             invoice_no=form.invoice_no.data, invoice_date=form.invoice_date.data, serial_number=form.serial_number.data,
@@ -150,21 +311,20 @@ def create():
             recipient_name=form.recipient_name.data, recipient_email=form.recipient_email.data, category=form.category.data,
             sub_category=form.sub_category.data, location=form.location.data
         )
-        db.session.add(a); db.session.commit(); flash("Asset added", "success")
+        db.session.add(a); bump_data_version(); db.session.commit(); flash("Asset added", "success")
         return redirect(url_for("assets.dashboard"))
-    return render_template("assets/form.html", form=form, mode="create", recips=recips, cats=cats)
+    return render_template("assets/form.html", form=form, mode="create", cats=cats, truncated=truncated)
 
 @assets_bp.route("/assets/<int:id>/edit", methods=["GET","POST"])
 @login_required
 def edit(id):
     a = Asset.query.get_or_404(id)
-    form = AssetForm(obj=a); _set_choices(form)
-    recips = Recipient.query.order_by(Recipient.name.asc()).all()
-    cats = CategoryM.query.order_by(CategoryM.name.asc()).all()
+    form = AssetForm(obj=a); truncated = _set_choices(form)
+    cats = _category_map(form)
     if form.validate_on_submit():
-        form.populate_obj(a); db.session.commit(); flash("Asset updated", "success")
+        form.populate_obj(a); bump_data_version(); db.session.commit(); flash("Asset updated", "success")
         return redirect(url_for("assets.view", id=a.id))
-    return render_template("assets/form.html", form=form, mode="edit", a=a, recips=recips, cats=cats)
+    return render_template("assets/form.html", form=form, mode="edit", a=a, cats=cats, truncated=truncated)
 
 @assets_bp.post("/assets/<int:id>/delete")
 @login_required
@@ -173,23 +333,95 @@ def delete(id):
         flash("Permission denied", "error")
         return redirect(url_for("assets.dashboard"))
     a = Asset.query.get_or_404(id)
+    db.session.add(AssetTombstone(asset_id=a.id))
     db.session.delete(a)
+    bump_data_version()
     db.session.commit()
     flash("Asset deleted", "success")
     return redirect(url_for("assets.dashboard"))
 
 
+# Bulk operations: one set-based statement over either the selected ids or every
+# asset matching the dashboard filter (scope=filter).
+BULK_FIELDS = ["location", "team", "category", "sub_category", "owner_email", "recipient_name", "recipient_email"]
+
+def _bulk_payload():
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        ids = data.get("ids") or []
+    else:
+        if current_app.config.get("WTF_CSRF_ENABLED", True):
+            csrf.protect()  # views are exempt for the JSON API; the dashboard form still carries a token
+        data = request.form.to_dict()
+        ids = request.form.getlist("ids")
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        ids = None
+    return data, ids
+
+def _bulk_target(data, ids):
+    """WHERE clause for a bulk operation, or None if nothing was selected."""
+    if data.get("scope") == "filter":
+        return and_(true(), *_asset_filters(*_filter_values(data)))
+    if ids:
+        return Asset.id.in_(ids)
+    return None
+
+def _bulk_done(data, message, payload, status=200):
+    if request.is_json:
+        return jsonify(payload), status
+    flash(message, "success" if status == 200 else "error")
+    return redirect(url_for("assets.dashboard", **{k: data[k] for k in ("q", "category", "location") if data.get(k)}))
+
+@csrf.exempt
+@assets_bp.post("/assets/bulk/update")
+@login_required
+def bulk_update():
+    data, ids = _bulk_payload()
+    if not can_create(): return _bulk_done(data, "Permission denied", {"error": "forbidden"}, 403)
+    target = _bulk_target(data, ids)
+    if target is None: return _bulk_done(data, "No assets selected", {"error": "ids or scope=filter required"}, 400)
+    changes = data.get("set") if request.is_json else {k[4:]: v for k, v in data.items() if k.startswith("set_") and not _is_blank(v)}
+    if not isinstance(changes, dict): return _bulk_done(data, "Nothing to change", {"error": "set must be an object"}, 400)
+    fields = [k for k in BULK_FIELDS if k in changes]
+    if not fields: return _bulk_done(data, "Nothing to change", {"error": f"set one of: {', '.join(BULK_FIELDS)}"}, 400)
+    vals = coerce_asset_fields(changes, fields)
+    res = db.session.execute(update(Asset).where(target).values(**vals).execution_options(synchronize_session=False))
+    bump_data_version()
+    db.session.commit()
+    return _bulk_done(data, f"Updated {res.rowcount} assets", {"updated": res.rowcount})
+
+@csrf.exempt
+@assets_bp.post("/assets/bulk/delete")
+@login_required
+def bulk_delete():
+    data, ids = _bulk_payload()
+    if not can_delete(): return _bulk_done(data, "Permission denied", {"error": "forbidden"}, 403)
+    target = _bulk_target(data, ids)
+    if target is None: return _bulk_done(data, "No assets selected", {"error": "ids or scope=filter required"}, 400)
+    # tombstones for delta sync, then the delete itself, in one transaction
+    db.session.execute(insert(AssetTombstone).from_select(
+        ["asset_id", "deleted_at"], select(Asset.id, literal(datetime.utcnow(), AssetTombstone.deleted_at.type)).where(target)))
+    res = db.session.execute(sa_delete(Asset).where(target).execution_options(synchronize_session=False))
+    bump_data_version()
+    db.session.commit()
+    return _bulk_done(data, f"Deleted {res.rowcount} assets", {"deleted": res.rowcount})
+
 @assets_bp.route("/assets/<int:id>")
 @login_required
 def view(id):
-    a = Asset.query.get_or_404(id)
+    a = db.session.get(Asset, id) or ArchivedAsset.query.get_or_404(id)
     return render_template("assets/view.html", a=a)
 
+EXPORT_BATCH = 2000
+
 @assets_bp.route("/export/excel")
 @login_required
 def export_excel():
+    """Assets matching ?q=&category=&location=, limited to ?columns= if given."""
     if not can_export(): flash("Permission denied", "error"); return redirect(url_for("assets.dashboard"))
-    df = pd.read_sql(Asset.query.statement, db.session.bind)
+    df = pd.read_sql(asset_select(request.args, _requested_columns(request.args)), db.session.connection())
     buf = io.BytesIO()
     with pd.ExcelWriter(buf, engine="openpyxl") as writer:
         df.to_excel(writer, index=False, sheet_name="Assets")
@@ -199,13 +431,149 @@ def export_excel():
 @assets_bp.route("/export/csv")
 @login_required
 def export_csv():
+    """Same filters/columns as export_excel; rows are streamed from the cursor in batches."""
+    if not can_export(): flash("Permission denied", "error"); return redirect(url_for("assets.dashboard"))
+    cols = _requested_columns(request.args)
+    stmt = asset_select(request.args, cols).execution_options(yield_per=EXPORT_BATCH)
+
+    def generate():
+        si = io.StringIO(); cw = csv.writer(si)
+        cw.writerow(cols)
+        for batch in db.session.execute(stmt).partitions():
+            cw.writerows(batch)
+            yield si.getvalue()
+            si.seek(0); si.truncate(0)
+        yield si.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype="text/csv",
+                    headers={"Content-Disposition": "attachment; filename=assets.csv"})
+
+# Columnar export (pyarrow is optional; Parquet/Arrow exports are disabled without it)
+DIMENSION_COLUMNS = {"manufacturer", "vendor", "mfg_country", "team", "category", "sub_category", "location",
+                     "is_bonded", "returnable_no", "cap_x"}
+
+def _arrow_type(pa, col):
+    if col.name in DIMENSION_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(col.type, db.DateTime):
+        return pa.timestamp("us")
+    if isinstance(col.type, db.Date):
+        return pa.date32()
+    if isinstance(col.type, db.Integer):
+        return pa.int64()
+    return pa.string()
+
+def _arrow_batches(pa, stmt, schema):
+    """
+    Yield RecordBatches straight from the cursor. Dimension columns share one growing
+    dictionary per column, so each batch's dictionary extends the previous one (valid
+    as an IPC dictionary delta).
+    """
+    dicts = {f.name: {} for f in schema if pa.types.is_dictionary(f.type)}
+    for rows in db.session.execute(stmt).partitions():
+        arrays = []
+        for i, field in enumerate(schema):
+            vals = [r[i] for r in rows]
+            lookup = dicts.get(field.name)
+            if lookup is None:
+                arrays.append(pa.array(vals, type=field.type))
+            else:
+                idx = [None if v is None else lookup.setdefault(v, len(lookup)) for v in vals]
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(idx, pa.int32()), pa.array(list(lookup), pa.string())))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _columnar_export(fmt):
     if not can_export(): flash("Permission denied", "error"); return redirect(url_for("assets.dashboard"))
-    si = io.StringIO(); cw = csv.writer(si)
-    cols = [c.name for c in Asset.__table__.columns]; cw.writerow(cols)
-    for a in Asset.query.order_by(Asset.id.desc()).all():
-        cw.writerow([getattr(a, c) for c in cols])
-    mem = io.BytesIO(si.getvalue().encode("utf-8"))
-    return send_file(mem, as_attachment=True, download_name="assets.csv", mimetype="text/csv")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        flash("Columnar export requires the pyarrow package", "error")
+        return redirect(url_for("assets.dashboard"))
+    cols = _requested_columns(request.args)
+    schema = pa.schema([(n, _arrow_type(pa, Asset.__table__.c[n])) for n in cols])
+    stmt = asset_select(request.args, cols).execution_options(yield_per=EXPORT_BATCH)
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        with pq.ParquetWriter(buf, schema, compression="zstd") as writer:
+            for batch in _arrow_batches(pa, stmt, schema):
+                writer.write_batch(batch)
+        name, mimetype = "assets.parquet", "application/vnd.apache.parquet"
+    else:
+        opts = pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+        with pa.ipc.new_stream(buf, schema, options=opts) as writer:
+            for batch in _arrow_batches(pa, stmt, schema):
+                writer.write_batch(batch)
+        name, mimetype = "assets.arrows", "application/vnd.apache.arrow.stream"
+    buf.seek(0)
+    return send_file(buf, as_attachment=True, download_name=name, mimetype=mimetype)
+
+@assets_bp.route("/export/parquet")
+@login_required
+def export_parquet():
+    """Zstd-compressed Parquet with date and dictionary-encoded dimension columns; same filters as export_csv."""
+    return _columnar_export("parquet")
+
+@assets_bp.route("/export/arrow")
+@login_required
+def export_arrow():
+    """Arrow IPC stream of the same record batches as export_parquet."""
+    return _columnar_export("arrow")
+
+# Delta sync
+DELTA_PAGE = 1000
+DELTA_MAX = 10000
+
+def _asset_dict(a):
+    out = {}
+    for c in Asset.__table__.columns:
+        v = getattr(a, c.name)
+        out[c.name] = v.isoformat() if isinstance(v, date) else v
+    return out
+
+def _parse_watermark(value):
+    """Watermark is '<iso timestamp>|<asset id>'; returns (datetime, id) or None."""
+    try:
+        ts, _, last_id = value.rpartition("|")
+        return datetime.fromisoformat(ts), int(last_id)
+    except Exception:
+        return None
+
+@assets_bp.route("/export/changes")
+@login_required
+def export_changes():
+    """
+    Rows created/updated and assets deleted or archived after ?since=<watermark>, oldest first.
+    Keyset-paged on (timestamp, id) so each call only reads the changed rows; pass
+    the returned `next` back as `since` until `has_more` is false.
+    """
+    if not can_export(): return jsonify({"error": "forbidden"}), 403
+    since = request.args.get("since", "").strip()
+    limit = min(max(request.args.get("limit", DELTA_PAGE, type=int), 1), DELTA_MAX)
+    mark = _parse_watermark(since) if since else None
+    if since and mark is None: return jsonify({"error": "invalid watermark"}), 400
+
+    uq = Asset.query
+    tq = AssetTombstone.query
+    if mark:
+        ts, last_id = mark
+        uq = uq.filter(or_(Asset.updated_at > ts, and_(Asset.updated_at == ts, Asset.id > last_id)))
+        tq = tq.filter(or_(AssetTombstone.deleted_at > ts, and_(AssetTombstone.deleted_at == ts, AssetTombstone.asset_id > last_id)))
+    ups = uq.order_by(Asset.updated_at.asc(), Asset.id.asc()).limit(limit + 1).all()
+    dels = tq.order_by(AssetTombstone.deleted_at.asc(), AssetTombstone.asset_id.asc()).limit(limit + 1).all()
+
+    # merge both streams on the shared (timestamp, id) key and cut one page
+    events = [(a.updated_at, a.id, a) for a in ups] + [(t.deleted_at, t.asset_id, t) for t in dels]
+    events.sort(key=lambda e: (e[0], e[1]))
+    page = events[:limit]
+    changes = []
+    for ts, asset_id, obj in page:
+        if isinstance(obj, AssetTombstone):
+            changes.append({"op": "delete", "id": asset_id, "at": ts.isoformat()})
+        else:
+            changes.append({"op": "upsert", "id": asset_id, "at": ts.isoformat(), "asset": _asset_dict(obj)})
+    nxt = f"{page[-1][0].isoformat()}|{page[-1][1]}" if page else since
+    return jsonify({"changes": changes, "next": nxt, "has_more": len(events) > limit})
 
 @assets_bp.route("/analytics")
 @login_required
@@ -227,6 +595,20 @@ def analytics_json():
         "calibration":[{"label":"Due ≤30d","value":due_soon},{"label":"OK","value":ok}]
     })
 
+@assets_bp.route("/analytics/trends.json")
+@login_required
+def analytics_trends():
+    """
+    ?dimension=category|location|team|calibration|total&from=YYYY-MM-DD&to=YYYY-MM-DD
+    Series read from the daily snapshot table only; long ranges come back weekly or monthly.
+    """
+    dimension = request.args.get("dimension", "location")
+    if dimension not in snapshots.DIMENSIONS: return jsonify({"error": "invalid dimension"}), 400
+    end = parse_date(request.args.get("to")) or date.today()
+    start = parse_date(request.args.get("from")) or end - timedelta(days=90)
+    if start > end: return jsonify({"error": "from is after to"}), 400
+    return jsonify(snapshots.trend(dimension, start, end))
+
 # Import
 EXPECTED_COLS = ["invoice_no","invoice_date","serial_number","purchase_order_no","received_date","owner_email","description","manufacturer","model","vendor","mfg_country","hsn_code","is_bonded","last_calibrated","next_calibration","notes","entry_no","returnable_no","cap_x","amortization_period","team","recipient_name","recipient_email","category","sub_category","location"]
 
@@ -241,6 +623,168 @@ def _read_df(path):
         return pd.read_excel(path)
     return pd.read_csv(path)
 
+def _validate_import_rows(rows, headers):
+    """Per-row preview checks; returns (empty counts per header, type issues, bad date rows)."""
+    empty_counts = {h: 0 for h in headers}
+    type_issues = []
+    bad_date_rows = 0
+    for r in rows:
+        for h in headers:
+            if r.get(h, "") in ("", None):
+                empty_counts[h] += 1
+
+        # Check email format
+        for email_field in ['owner_email', 'recipient_email']:
+            email_val = r.get(email_field, "")
+            if email_val and "@" not in email_val:
+                type_issues.append({"column": email_field, "count": 1})
+
+        # Check for date parse issues
+        for f in DATE_HEADERS:
+            v = r.get(f, "")
+            if v not in ("", None):
+                if parse_date(v) is None:
+                    bad_date_rows += 1
+                    break
+    return empty_counts, type_issues, bad_date_rows
+
+def _xlsx_row_dict(row, idx_map, headers):
+    row_data = {}
+    for h in headers:
+        i = idx_map.get(h)
+        if i is not None and i < len(row):
+            row_data[h] = _cell_to_json(row[i], h)
+        else:
+            row_data[h] = ""
+    return row_data
+
+# Parallel import: big uploads are split into chunks (CSV byte ranges cut at record
+# boundaries, XLSX row batches read by a single parser) and validated in a process pool.
+# Chunk results are merged in file order, so the preview is identical to the serial path.
+def _csv_byte_ranges(path, parts):
+    """
+    Byte ranges of the data rows, cut only at a newline where the quotes seen since the
+    header are balanced, so line breaks inside quoted cells never split a record.
+    None when the header itself holds an open quote.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        if fh.readline().count(b'"') % 2:
+            return None
+        start = pos = fh.tell()
+        step = max((size - start) // parts, 1)
+        bounds, quoted, target = [start], False, start + step
+        while len(bounds) < parts:
+            block = fh.read(1 << 20)
+            if not block:
+                break
+            i = 0
+            while i < len(block) and len(bounds) < parts:
+                if pos + i < target:
+                    j = min(len(block), target - pos)
+                else:
+                    nl = block.find(b"\n", i)
+                    j = len(block) if nl < 0 else nl + 1
+                quoted ^= block.count(b'"', i, j) % 2 == 1
+                i = j
+                if pos + i >= target and block[i - 1:i] == b"\n" and not quoted and pos + i < size:
+                    bounds.append(pos + i)
+                    target = max(start + len(bounds) * step, pos + i)
+            pos += len(block)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def _csv_chunk_worker(path, start, end, fieldnames, headers, strict=True):
+    """
+    Rows and validation for one byte range. With `strict`, a record whose field count
+    differs from the header means the cut may not be a record boundary: returns None
+    so the caller re-reads the file serially.
+    """
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        text = fh.read(end - start).decode("utf-8")
+    rows = []
+    for rec in csv.reader(io.StringIO(text, newline="")):
+        if not rec:
+            continue
+        if strict and len(rec) != len(fieldnames):
+            return None
+        r = dict(zip(fieldnames, rec))
+        rows.append({k: r.get(k, "") for k in headers})
+    return (rows,) + _validate_import_rows(rows, headers)
+
+def _xlsx_chunk_worker(raw_rows, idx_map, headers):
+    rows = [_xlsx_row_dict(row, idx_map, headers) for row in raw_rows if any(row)]
+    return (rows,) + _validate_import_rows(rows, headers)
+
+XLSX_BATCH = 5000
+
+def _parallel_preview(path, headers):
+    """Returns (file headers, rows, (empties, type_issues, bad_date_rows)) for a saved upload."""
+    from concurrent.futures import ProcessPoolExecutor
+    workers = current_app.config.get("IMPORT_WORKERS") or os.cpu_count() or 1
+    ranges = ()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if path.lower().endswith(".csv"):
+            with open(path, "rb") as fh:
+                first = fh.readline().decode("utf-8")
+            fieldnames = next(csv.reader([first]), None)
+            if not fieldnames:
+                return None, [], None
+            file_headers = [h.strip() for h in fieldnames if h]
+            ranges = _csv_byte_ranges(path, workers)
+            futures = [pool.submit(_csv_chunk_worker, path, a, b, fieldnames, headers)
+                       for a, b in ranges or []]
+        else:
+            # openpyxl can only stream a sheet from the top, so the XML is parsed once
+            # here and row batches are handed to the pool for conversion and validation
+            wb = load_workbook(path, read_only=True, data_only=True)
+            try:
+                it = wb.active.iter_rows(values_only=True)
+                header_row = next(it, None)
+                if header_row is None:
+                    return None, [], None
+                file_headers = [str(v).strip() if v is not None else "" for v in header_row]
+                file_headers = [h for h in file_headers if h]
+                idx_map = {name: i for i, name in enumerate(file_headers)}
+                futures, batch = [], []
+                for row in it:
+                    batch.append(row)
+                    if len(batch) >= XLSX_BATCH:
+                        futures.append(pool.submit(_xlsx_chunk_worker, batch, idx_map, headers))
+                        batch = []
+                if batch:
+                    futures.append(pool.submit(_xlsx_chunk_worker, batch, idx_map, headers))
+            finally:
+                wb.close()
+        parts = [fut.result() for fut in futures]  # file order
+        if ranges is None or None in parts:
+            # a cut could not be proven to sit between records: read it all in order
+            parts = [_csv_chunk_worker(path, len(first.encode("utf-8")), os.path.getsize(path), fieldnames, headers, strict=False)]
+
+    rows, type_issues, bad_date_rows = [], [], 0
+    empties = {h: 0 for h in headers}
+    for part_rows, part_empties, part_issues, part_bad in parts:
+        rows.extend(part_rows)
+        for h, n in part_empties.items():
+            empties[h] += n
+        type_issues.extend(part_issues)
+        bad_date_rows += part_bad
+    return file_headers, rows, (empties, type_issues, bad_date_rows)
+
+def _stage_rows(rows):
+    path = _upload_path("import_rows.jsonl")
+    with open(path, "w", encoding="utf-8") as fh:
+        for r in rows:
+            fh.write(json.dumps(r) + "\n")
+    return path
+
+def _load_staged(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
 @assets_bp.route("/import", methods=["GET"])
 @login_required
 def import_page():
@@ -274,8 +818,30 @@ def import_preview():
     rows = []
     errors = []
     warnings = []
+    precomputed = None
 
-    if filename.endswith(".csv"):
+    parallel = (request.content_length or 0) >= current_app.config["IMPORT_PARALLEL_MIN_BYTES"]
+    if parallel and filename.endswith((".csv", ".xlsx")):
+        path = _upload_path(f.filename)
+        f.save(path)
+        try:
+            file_headers, rows, precomputed = _parallel_preview(path, required_headers)
+        except Exception as e:
+            flash(f"Error reading file: {str(e)}", "error")
+            return redirect(url_for("assets.import_page"))
+        finally:
+            os.remove(path)
+        if file_headers is None:
+            flash("File has no header row.", "error")
+            return redirect(url_for("assets.import_page"))
+        missing = [h for h in required_headers if h not in file_headers]
+        extra = [h for h in file_headers if h not in required_headers]
+        if missing:
+            errors.append(f"Missing required headers: {', '.join(missing)}")
+        if extra:
+            warnings.append(f"Extra headers will be ignored: {', '.join(extra)}")
+
+    elif filename.endswith(".csv"):
         try:
             from io import TextIOWrapper
             import csv
@@ -331,14 +897,7 @@ def import_preview():
                 if not any(row):  # Skip completely empty rows
                     continue
                     
-                row_data = {}
-                for h in required_headers:
-                    i = idx_map.get(h)
-                    if i is not None and i < len(row):
-                        row_data[h] = _cell_to_json(row[i], h)
-                    else:
-                        row_data[h] = ""
-                rows.append(row_data)
+                rows.append(_xlsx_row_dict(row, idx_map, required_headers))
                 
         except Exception as e:
             flash(f"Error reading Excel file: {str(e)}", "error")
@@ -352,35 +911,17 @@ def import_preview():
         flash("No data rows found in the file", "error")
         return redirect(url_for("assets.import_page"))
 
-    # save raw rows to session (commit route will coerce types)
-    session["import_rows"] = rows
+    # save raw rows to session (commit route will coerce types); large parallel
+    # imports are staged on disk instead of in the session cookie
+    if precomputed is None:
+        session["import_rows"] = rows
+        session.pop("import_staged", None)
+    else:
+        session["import_staged"] = _stage_rows(rows)
+        session.pop("import_rows", None)
 
     # Validation and analytics
-    empty_counts = {h: 0 for h in required_headers}
-    type_issues = []
-    invalid_rows = 0
-    
-    for r in rows:
-        for h in required_headers:
-            if r.get(h, "") in ("", None):
-                empty_counts[h] += 1
-        
-        # Check email format
-        for email_field in ['owner_email', 'recipient_email']:
-            email_val = r.get(email_field, "")
-            if email_val and "@" not in email_val:
-                type_issues.append({"column": email_field, "count": 1})
-
-    # Check for date parse issues
-    date_fields = ["invoice_date","received_date","last_calibrated","next_calibration"]
-    bad_date_rows = 0
-    for r in rows:
-        for f in date_fields:
-            v = r.get(f, "")
-            if v not in ("", None):
-                if parse_date(v) is None:
-                    bad_date_rows += 1
-                    break
+    empty_counts, type_issues, bad_date_rows = precomputed or _validate_import_rows(rows, required_headers)
 
     # Calculate invalid rows
     invalid_rows = bad_date_rows + len([t for t in type_issues if t["count"] > 0])
@@ -416,7 +957,8 @@ def import_preview():
 @assets_bp.route("/import/commit", methods=["POST"])
 @login_required
 def import_commit():
-    rows = session.get("import_rows") or []
+    staged = session.get("import_staged")
+    rows = session.get("import_rows") or (_load_staged(staged) if staged else [])
     if not rows:
         flash("Nothing to import (no rows found). Please upload again.", "warning")
         return redirect(url_for("assets.import_page"))
@@ -427,34 +969,7 @@ def import_commit():
 
     for idx, r in enumerate(rows, start=2):  # start=2 to reflect CSV line numbers
         try:
-            asset = Asset(
-                invoice_no           = clean_str(r.get("invoice_no")),
-                invoice_date         = parse_date(r.get("invoice_date")),
-                serial_number        = clean_str(r.get("serial_number")),
-                purchase_order_no    = clean_str(r.get("purchase_order_no")),
-                received_date        = parse_date(r.get("received_date")),
-                owner_email          = clean_str(r.get("owner_email")),
-                description          = clean_str(r.get("description")),
-                manufacturer         = clean_str(r.get("manufacturer")),
-                model                = clean_str(r.get("model")),
-                vendor               = clean_str(r.get("vendor")),
-                mfg_country          = clean_str(r.get("mfg_country")),
-                hsn_code             = clean_str(r.get("hsn_code")),
-                is_bonded            = norm_ynna(r.get("is_bonded")),
-                last_calibrated      = parse_date(r.get("last_calibrated")),
-                next_calibration     = parse_date(r.get("next_calibration")),
-                notes                = clean_str(r.get("notes")),
-                entry_no             = clean_str(r.get("entry_no")),
-                returnable_no        = norm_ynna(r.get("returnable_no")),
-                cap_x                = norm_ynna(r.get("cap_x")),
-                amortization_period  = clean_str(r.get("amortization_period")),
-                team                 = clean_str(r.get("team")),
-                recipient_name       = clean_str(r.get("recipient_name")),
-                recipient_email      = clean_str(r.get("recipient_email")),
-                category             = clean_str(r.get("category")),
-                sub_category         = clean_str(r.get("sub_category")),
-                location             = clean_str(r.get("location")),
-            )
+            asset = Asset(**coerce_asset_fields(r))
             db.session.add(asset)
             db.session.flush()  # validate row-by-row
             created += 1
@@ -464,8 +979,13 @@ def import_commit():
             if len(fail_examples) < 5:
                 fail_examples.append(f"Row {idx}: {e}")
 
+    bump_data_version()
     db.session.commit()
     session.pop("import_rows", None)
+    if staged:
+        session.pop("import_staged", None)
+        if os.path.exists(staged):
+            os.remove(staged)
 
     if failed == 0:
         flash(f"Imported {created} assets successfully.", "success")
@@ -475,3 +995,132 @@ def import_commit():
             flash("Examples: " + " | ".join(fail_examples), "warning")
 
     return redirect(url_for("assets.dashboard"))
+
+
+# Batch API
+BATCH_CHUNK = 500
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl", "application/x-jsonlines"}
+
+def _iter_batch_records():
+    """Yield (record, error) from a JSON array/object body or a streamed NDJSON body."""
+    if request.mimetype in NDJSON_TYPES:
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError as e:
+                yield None, f"invalid JSON: {e}"
+        return
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("operations", [data])
+    if not isinstance(data, list):
+        yield None, "body must be a JSON array, an object or NDJSON"
+        return
+    for rec in data:
+        yield rec, None
+
+def _prepare_batch_record(rec):
+    """Return (op, asset_id, values, error) for one raw API record."""
+    if not isinstance(rec, dict):
+        return None, None, None, "record must be an object"
+    data = rec.get("asset", rec)
+    if not isinstance(data, dict):
+        return None, None, None, "asset must be an object"
+    asset_id = rec.get("id", data.get("id"))
+    op = rec.get("op") or ("update" if asset_id else "create")
+    if op not in ("create", "update"):
+        return op, asset_id, None, f"unknown op '{op}'"
+    if op == "update":
+        try:
+            asset_id = int(asset_id)
+        except (TypeError, ValueError):
+            return op, None, None, "update requires an integer id"
+        fields = [k for k in EXPECTED_COLS if k in data]
+    else:
+        fields = None
+    vals = coerce_asset_fields(data, fields)
+    for k in DATE_HEADERS:
+        if k in vals and vals[k] is None and not _is_blank(data.get(k)):
+            return op, asset_id, None, f"{k}: unparseable date '{data.get(k)}'"
+    for k in ("owner_email", "recipient_email"):
+        if vals.get(k) and "@" not in vals[k]:
+            return op, asset_id, None, f"{k}: invalid email"
+    return op, asset_id, vals, None
+
+def _apply_batch_chunk(chunk):
+    """Write one chunk in a single transaction; on failure retry record by record to isolate errors."""
+    results = []
+    upd_ids = {aid for _, op, aid, _ in chunk if op == "update"}
+    existing = {a.id: a for a in Asset.query.filter(Asset.id.in_(upd_ids)).all()} if upd_ids else {}
+    staged = []
+    for idx, op, aid, vals in chunk:
+        if op == "update":
+            a = existing.get(aid)
+            if a is None:
+                results.append({"index": idx, "ok": False, "op": op, "id": aid, "error": "not found"})
+                continue
+            for k, v in vals.items():
+                setattr(a, k, v)
+        else:
+            a = Asset(**vals)
+            db.session.add(a)
+        staged.append((idx, op, a))
+    try:
+        db.session.flush()
+        results += [{"index": idx, "ok": True, "op": op, "id": a.id} for idx, op, a in staged]
+        bump_data_version()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(chunk) == 1:
+            idx, op, aid, _ = chunk[0]
+            return [{"index": idx, "ok": False, "op": op, "id": aid, "error": str(e.__cause__ or e)}]
+        results = []
+        for item in chunk:
+            results += _apply_batch_chunk([item])
+    return sorted(results, key=lambda r: r["index"])
+
+@csrf.exempt
+@assets_bp.post("/api/assets/batch")
+@login_required
+def api_batch():
+    """
+    Create/update assets from a JSON array (or {"operations": [...]}) or an NDJSON stream.
+    Each record is {"op": "create"|"update", "id": ..., "asset": {...}} or a flat asset
+    object (update when it carries an id). Values go through the import coercion rules.
+    Streams back one NDJSON result per record, then a summary line.
+    """
+    if not can_create(): return jsonify({"error": "forbidden"}), 403
+
+    def generate():
+        counts = {"created": 0, "updated": 0, "failed": 0}
+        chunk = []
+
+        def flush():
+            for res in _apply_batch_chunk(chunk):
+                if res["ok"]:
+                    counts["created" if res["op"] == "create" else "updated"] += 1
+                else:
+                    counts["failed"] += 1
+                yield json.dumps(res) + "\n"
+            chunk.clear()
+
+        for idx, (rec, err) in enumerate(_iter_batch_records()):
+            op = aid = vals = None
+            if err is None:
+                op, aid, vals, err = _prepare_batch_record(rec)
+            if err is not None:
+                counts["failed"] += 1
+                yield json.dumps({"index": idx, "ok": False, "op": op, "id": aid, "error": err}) + "\n"
+                continue
+            chunk.append((idx, op, aid, vals))
+            if len(chunk) >= BATCH_CHUNK:
+                yield from flush()
+        if chunk:
+            yield from flush()
+        yield json.dumps({"summary": counts}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
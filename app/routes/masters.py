@@ -1,12 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from ..extensions import db, csrf
 from ..models import (
     ROLE_SUPERADMIN, ROLE_ADMIN,
     Team, Manufacturer, VendorM, LocationM,
-    Recipient, CategoryM, SubCategoryM
+    Recipient, CategoryM, SubCategoryM, Asset, ArchivedAsset
 )
-import json
+from .. import typeahead
+from ..cache import bump_data_version
+from sqlalchemy import update, select, func
+import json, threading
 
 masters_bp = Blueprint("masters", __name__, url_prefix="/masters")
 
@@ -20,18 +23,22 @@ def index():
         flash("Admins only", "error")
         return redirect(url_for("assets.dashboard"))
     tab = request.args.get("tab", "team")
-    teams = Team.query.order_by(Team.name.asc()).all()
-    mans = Manufacturer.query.order_by(Manufacturer.name.asc()).all()
-    vendors = VendorM.query.order_by(VendorM.name.asc()).all()
-    locs = LocationM.query.order_by(LocationM.name.asc()).all()
-    recips = Recipient.query.order_by(Recipient.name.asc()).all()
-    cats = CategoryM.query.order_by(CategoryM.name.asc()).all()
-    subcats = SubCategoryM.query.order_by(SubCategoryM.name.asc()).all()
+    q = request.args.get("q", "").strip()
+    # only the active tab is rendered; recipients are served from the typeahead index
+    teams = Team.query.order_by(Team.name.asc()).all() if tab == "team" else []
+    mans = Manufacturer.query.order_by(Manufacturer.name.asc()).all() if tab == "manufacturer" else []
+    vendors = VendorM.query.order_by(VendorM.name.asc()).all() if tab == "vendor" else []
+    locs = LocationM.query.order_by(LocationM.name.asc()).all() if tab == "location" else []
+    recips = typeahead.get_index("recipient", Recipient).search(q, typeahead.SEARCH_MAX + 1) if tab == "recipient" else []
+    recips_more = len(recips) > typeahead.SEARCH_MAX
+    recips = recips[:typeahead.SEARCH_MAX]
+    cats = CategoryM.query.order_by(CategoryM.name.asc()).all() if tab == "category" else []
+    subcats = []
     return render_template(
         "masters/index.html",
-        tab=tab,
+        tab=tab, q=q,
         teams=teams, mans=mans, vendors=vendors, locs=locs,
-        recips=recips, cats=cats, subcats=subcats
+        recips=recips, recips_more=recips_more, cats=cats, subcats=subcats
     )
 
 # ---------- helpers ----------
@@ -77,7 +84,8 @@ def api_add_team():
     if not name: return _bad("name required")
     if Team.query.filter_by(name=name).first(): return _exists()
     obj = Team(name=name)
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("team", obj)
     return _created({"id": obj.id, "name": obj.name})
 
 @csrf.exempt
@@ -89,7 +97,8 @@ def api_add_manufacturer():
     if not name: return _bad("name required")
     if Manufacturer.query.filter_by(name=name).first(): return _exists()
     obj = Manufacturer(name=name)
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("manufacturer", obj)
     return _created({"id": obj.id, "name": obj.name})
 
 @csrf.exempt
@@ -101,7 +110,8 @@ def api_add_vendor():
     if not name: return _bad("name required")
     if VendorM.query.filter_by(name=name).first(): return _exists()
     obj = VendorM(name=name)
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("vendor", obj)
     return _created({"id": obj.id, "name": obj.name})
 
 @csrf.exempt
@@ -113,7 +123,8 @@ def api_add_location():
     if not name: return _bad("name required")
     if LocationM.query.filter_by(name=name).first(): return _exists()
     obj = LocationM(name=name)
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("location", obj)
     return _created({"id": obj.id, "name": obj.name})
 
 @csrf.exempt
@@ -127,7 +138,8 @@ def api_add_recipient():
     if not name or not email: return _bad("name and email required")
     if Recipient.query.filter_by(name=name, email=email).first(): return _exists()
     obj = Recipient(name=name, email=email)
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("recipient", obj)
     return _created({"id": obj.id, "name": obj.name, "email": obj.email})
 
 @csrf.exempt
@@ -139,7 +151,8 @@ def api_add_category():
     if not name: return _bad("name required")
     if CategoryM.query.filter_by(name=name).first(): return _exists()
     obj = CategoryM(name=name)
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("category", obj)
     return _created({"id": obj.id, "name": obj.name})
 
 @csrf.exempt
@@ -152,7 +165,8 @@ def api_add_subcategory():
     category_id = data.get("category_id")
     if not name or not category_id: return _bad("name and category_id required")
     obj = SubCategoryM(name=name, category_id=int(category_id))
-    db.session.add(obj); db.session.commit()
+    db.session.add(obj); bump_data_version(); db.session.commit()
+    typeahead.note_saved("subcategory", obj)
     return _created({"id": obj.id, "name": obj.name, "category_id": obj.category_id})
 
 # ---------- read ----------
@@ -164,6 +178,86 @@ def api_get_subcategories():
     subs = SubCategoryM.query.filter_by(category_id=category_id).order_by(SubCategoryM.name.asc()).all()
     return jsonify([{"id": s.id, "name": s.name} for s in subs])
 
+@masters_bp.get("/api/search/<kind>")
+@login_required
+def api_search(kind):
+    """Typeahead: ?q=<prefix or substring>&limit=N[&category_id=] served from the in-memory index."""
+    model = _model_for(kind)
+    if not model: return _bad("invalid kind")
+    limit = min(max(request.args.get("limit", typeahead.SEARCH_LIMIT, type=int), 1), typeahead.SEARCH_MAX)
+    category_id = request.args.get("category_id", type=int)
+    where = (lambda p: p["category_id"] == category_id) if kind == "subcategory" and category_id else None
+    return jsonify(typeahead.get_index(kind, model).search(request.args.get("q", ""), limit, where))
+
+# ---------- rename cascade ----------
+# master kind -> Asset column storing its name (recipients use name + email)
+_CASCADE_COLUMNS = {
+    "team": "team",
+    "manufacturer": "manufacturer",
+    "vendor": "vendor",
+    "location": "location",
+    "category": "category",
+    "subcategory": "sub_category",
+}
+
+def _cascade_targets(kind, obj, old):
+    """(model, criteria, values) rewriting live and archived assets that still carry the old value."""
+    for model in (Asset, ArchivedAsset):
+        if kind == "recipient":
+            crit = [model.recipient_name == old["name"], model.recipient_email == old["email"]]
+            vals = {"recipient_name": obj.name, "recipient_email": obj.email}
+        else:
+            col = _CASCADE_COLUMNS[kind]
+            crit = [getattr(model, col) == old["name"]]
+            if kind == "subcategory":
+                crit.append(model.category == obj.category.name)
+            vals = {col: obj.name}
+        yield model, crit, vals
+
+# background renames that raised part-way; listed and re-run via /api/cascade/failed|retry
+_failed_cascades = []
+
+def _cascade_chunked(app, job, targets, chunk):
+    """Background rewrite for large renames: chunk-sized UPDATEs, one transaction each."""
+    with app.app_context():
+        try:
+            for model, crit, vals in targets:
+                while True:
+                    ids = select(model.id).where(*crit).limit(chunk).scalar_subquery()
+                    n = db.session.execute(update(model).where(model.id.in_(ids)).values(**vals)
+                                           .execution_options(synchronize_session=False)).rowcount
+                    bump_data_version()
+                    db.session.commit()
+                    if n < chunk:
+                        break
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception("Asset cascade for %s %s (%r -> %r) failed", job["kind"], job["id"], job["old"], job["new"])
+            _failed_cascades.append(dict(job, error=str(e)))
+
+def _start_cascade(kind, obj, old, targets):
+    job = {"kind": kind, "id": obj.id, "old": old, "new": {"name": obj.name, "email": getattr(obj, "email", None)}}
+    threading.Thread(target=_cascade_chunked, args=(current_app._get_current_object(), job, targets, current_app.config["RENAME_CHUNK"]), daemon=True).start()
+
+@masters_bp.get("/api/cascade/failed")
+@login_required
+def api_cascade_failed():
+    if not can_manage(): return _forbidden()
+    return jsonify(_failed_cascades)
+
+@csrf.exempt
+@masters_bp.post("/api/cascade/retry")
+@login_required
+def api_cascade_retry():
+    """Re-run every failed background rename against the master's current value."""
+    if not can_manage(): return _forbidden()
+    jobs = list(_failed_cascades); del _failed_cascades[:len(jobs)]
+    for job in jobs:
+        obj = _model_for(job["kind"]).query.get(job["id"])
+        if obj is not None:
+            _start_cascade(job["kind"], obj, job["old"], list(_cascade_targets(job["kind"], obj, job["old"])))
+    return jsonify({"ok": True, "retried": len(jobs)}), 202
+
 # ---------- update / delete ----------
 @csrf.exempt
 @masters_bp.post("/api/update/<kind>/<int:item_id>")
@@ -174,6 +268,7 @@ def api_update(kind, item_id):
     if not model: return _bad("invalid kind")
     obj = model.query.get_or_404(item_id)
     data = _payload()
+    old = {"name": obj.name, "email": getattr(obj, "email", None)}
     if kind == "recipient":
         name = data.get("name") or ""
         email = data.get("email") or ""
@@ -183,8 +278,24 @@ def api_update(kind, item_id):
         name = data.get("name") or ""
         if not name: return _bad("name required")
         obj.name = name
+
+    # assets store master values as plain strings: rewrite them with one UPDATE per
+    # table in the same transaction, or in the background when there are too many
+    targets = [] if old == {"name": obj.name, "email": getattr(obj, "email", None)} else list(_cascade_targets(kind, obj, old))
+    pending = sum(db.session.query(func.count(m.id)).filter(*crit).scalar() for m, crit, _ in targets)
+    if pending > current_app.config["RENAME_SYNC_LIMIT"]:
+        bump_data_version()
+        db.session.commit()
+        typeahead.note_saved(kind, obj)
+        _start_cascade(kind, obj, old, targets)
+        return jsonify({"ok": True, "assets_updated": 0, "assets_pending": pending, "background": True}), 202
+    updated = 0
+    for m, crit, vals in targets:
+        updated += db.session.execute(update(m).where(*crit).values(**vals).execution_options(synchronize_session=False)).rowcount
+    bump_data_version()
     db.session.commit()
-    return jsonify({"ok": True})
+    typeahead.note_saved(kind, obj)
+    return jsonify({"ok": True, "assets_updated": updated})
 
 @csrf.exempt
 @masters_bp.delete("/api/delete/<kind>/<int:item_id>")
@@ -194,5 +305,6 @@ def api_delete(kind, item_id):
     model = _model_for(kind)
     if not model: return _bad("invalid kind")
     obj = model.query.get_or_404(item_id)
-    db.session.delete(obj); db.session.commit()
+    db.session.delete(obj); bump_data_version(); db.session.commit()
+    typeahead.note_deleted(kind, item_id)
     return jsonify({"ok": True})
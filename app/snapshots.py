@@ -0,0 +1,67 @@
+from collections import Counter
+from datetime import date, timedelta
+from sqlalchemy import func
+from .extensions import db
+from .models import Asset, AssetSnapshot, calibration_bucket
+
+DIMENSIONS = ["total", "category", "location", "team", "calibration"]
+TREND_MAX_POINTS = 120
+
+
+def take_snapshot(day=None):
+    """
+    Write today's rollup rows from one grouped scan of the asset table. The scan
+    sees the current data, so `day` may only be today; past days cannot be
+    back-filled. Re-running replaces today's rows. Returns the number of rows written.
+    """
+    today = date.today()
+    day = day or today
+    if day != today:
+        raise ValueError(f"Snapshots record the current data; {day.isoformat()} is not today ({today.isoformat()})")
+    rows = (db.session.query(Asset.category, Asset.location, Asset.team, calibration_bucket(day), func.count(Asset.id))
+            .group_by(Asset.category, Asset.location, Asset.team, calibration_bucket(day)).all())
+    counts = {d: Counter() for d in DIMENSIONS}
+    for cat, loc, team, cal, n in rows:
+        counts["total"][""] += n
+        counts["category"][cat or ""] += n
+        counts["location"][loc or ""] += n
+        counts["team"][team or ""] += n
+        counts["calibration"][cal] += n
+    AssetSnapshot.query.filter_by(day=day).delete()
+    snaps = [AssetSnapshot(day=day, dimension=d, value=v, count=n) for d, c in counts.items() for v, n in c.items()]
+    db.session.add_all(snaps)
+    db.session.commit()
+    return len(snaps)
+
+
+def _bucket_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def trend(dimension, start, end, max_points=TREND_MAX_POINTS):
+    """
+    Series per value of `dimension` between start and end. When the range holds more
+    than `max_points` days it is downsampled to weeks or months, keeping the last
+    snapshot in each bucket (counts are levels, not flows).
+    """
+    span = (end - start).days + 1
+    granularity = "day" if span <= max_points else "week" if span <= max_points * 7 else "month"
+    rows = (db.session.query(AssetSnapshot.day, AssetSnapshot.value, AssetSnapshot.count)
+            .filter(AssetSnapshot.dimension == dimension, AssetSnapshot.day >= start, AssetSnapshot.day <= end)
+            .order_by(AssetSnapshot.day.asc()).all())
+    latest = {}  # bucket -> (day, {value: count}); rows are in day order, so later days win
+    for day, value, n in rows:
+        b = _bucket_start(day, granularity)
+        if b not in latest or latest[b][0] != day:
+            latest[b] = (day, {})
+        latest[b][1][value] = n
+    labels = sorted(latest)
+    values = sorted({v for _, counts in latest.values() for v in counts})
+    series = [{"label": v or ("Total" if dimension == "total" else "Unknown"),
+               "data": [latest[b][1].get(v, 0) for b in labels]} for v in values]
+    return {"dimension": dimension, "granularity": granularity,
+            "labels": [b.isoformat() for b in labels], "series": series}
@@ -0,0 +1,115 @@
+from bisect import bisect_left, insort
+from threading import Lock
+from .cache import data_version
+
+SEARCH_LIMIT = 20
+SEARCH_MAX = 100
+
+
+class TypeaheadIndex:
+    """
+    Sorted (lowercased key, id) list for one master table.
+    Prefix lookups are a bisect; substring matches fill the remaining slots.
+    """
+
+    def __init__(self):
+        self.entries = []   # sorted [(key, id)]
+        self.items = {}     # id -> (key, payload)
+        self.lock = Lock()
+
+    @staticmethod
+    def _key(payload):
+        key = payload["name"]
+        if payload.get("email"):
+            key += " " + payload["email"]
+        return key.lower()
+
+    def build(self, payloads):
+        with self.lock:
+            self.items = {p["id"]: (self._key(p), p) for p in payloads}
+            self.entries = sorted((k, i) for i, (k, _) in self.items.items())
+
+    def _remove(self, item_id):
+        old = self.items.pop(item_id, None)
+        if old:
+            pos = bisect_left(self.entries, (old[0], item_id))
+            if pos < len(self.entries) and self.entries[pos] == (old[0], item_id):
+                del self.entries[pos]
+
+    def put(self, payload):
+        with self.lock:
+            self._remove(payload["id"])
+            key = self._key(payload)
+            self.items[payload["id"]] = (key, payload)
+            insort(self.entries, (key, payload["id"]))
+
+    def remove(self, item_id):
+        with self.lock:
+            self._remove(item_id)
+
+    def search(self, q="", limit=SEARCH_LIMIT, where=None):
+        """Prefix matches first (in name order), then substring matches; at most `limit`."""
+        q = (q or "").strip().lower()
+        out, seen = [], set()
+        with self.lock:
+            pos = bisect_left(self.entries, (q,))
+            while pos < len(self.entries) and len(out) < limit:
+                key, item_id = self.entries[pos]
+                if not key.startswith(q):
+                    break
+                payload = self.items[item_id][1]
+                if where is None or where(payload):
+                    out.append(payload); seen.add(item_id)
+                pos += 1
+            if q and len(out) < limit:
+                for key, item_id in self.entries:
+                    if item_id in seen or q not in key:
+                        continue
+                    payload = self.items[item_id][1]
+                    if where is None or where(payload):
+                        out.append(payload)
+                        if len(out) >= limit:
+                            break
+        return out
+
+
+# kind -> (data version it was built under, index); other workers' writes move the
+# stamp, so a stale index is rebuilt on next use
+_indexes = {}
+_indexes_lock = Lock()
+
+
+def payload_for(kind, obj):
+    p = {"id": obj.id, "name": obj.name}
+    if kind == "recipient":
+        p["email"] = obj.email
+    if kind == "subcategory":
+        p["category_id"] = obj.category_id
+    return p
+
+
+def get_index(kind, model):
+    """Index for a master kind, (re)built from the table when the data version has moved."""
+    version = data_version()
+    entry = _indexes.get(kind)
+    if entry is None or entry[0] != version:
+        with _indexes_lock:
+            entry = _indexes.get(kind)
+            if entry is None or entry[0] != version:
+                idx = TypeaheadIndex()
+                idx.build([payload_for(kind, o) for o in model.query.all()])
+                entry = _indexes[kind] = (version, idx)
+    return entry[1]
+
+
+def note_saved(kind, obj):
+    """Keep a built index in step with an insert/update; unbuilt indexes load lazily."""
+    entry = _indexes.get(kind)
+    if entry is not None:
+        entry[1].put(payload_for(kind, obj))
+
+
+def note_deleted(kind, item_id):
+    entry = _indexes.get(kind)
+    if entry is not None:
+        entry[1].remove(item_id)
@@ -0,0 +1,48 @@
+import csv
+
+import pytest
+
+from app.routes.assets import _csv_byte_ranges, _csv_chunk_worker
+
+HEADERS = ["invoice_no", "notes", "location"]
+
+
+def _write(path, records):
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(HEADERS)
+        w.writerows(records)
+
+
+def _serial(path):
+    with open(path, encoding="utf-8", newline="") as fh:
+        return [{k: r.get(k) or "" for k in HEADERS} for r in csv.DictReader(fh)]
+
+
+def _chunked(path, parts):
+    with open(path, encoding="utf-8", newline="") as fh:
+        fieldnames = next(csv.reader(fh))
+    return [_csv_chunk_worker(path, a, b, fieldnames, HEADERS) for a, b in _csv_byte_ranges(path, parts)]
+
+
+@pytest.mark.parametrize("parts", [2, 3, 7, 16])
+def test_quoted_line_breaks_stay_in_one_chunk(tmp_path, parts):
+    path = tmp_path / "assets.csv"
+    _write(path, [(f"INV{i}", f"line one\nline two, \"quoted\"\r\nline {i}", "Pune") for i in range(3000)])
+    chunks = _chunked(path, parts)
+    assert None not in chunks
+    rows = [r for c in chunks for r in c[0]]
+    assert len(rows) == 3000
+    assert rows == _serial(path)
+
+
+def test_stray_quote_is_reported_for_serial_fallback(tmp_path):
+    # an unquoted 5" is literal to the csv module but flips the quote parity
+    path = tmp_path / "assets.csv"
+    records = [(f"INV{i}", "plain", "Pune") for i in range(2000)]
+    records[10] = ("INV10", 'display 5" wide', "Pune")
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(",".join(HEADERS) + "\r\n")
+        fh.writelines(",".join(r) + "\r\n" for r in records)
+    chunks = _chunked(path, 4)
+    assert None in chunks or [r for c in chunks for r in c[0]] == _serial(path)